@@ -1,22 +1,80 @@
 # ai_server.py
 import os
+import atexit
+import logging
+import shutil
+import tempfile
+from pathlib import Path
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-from ai_service import analyze_image_file
+from ai_service import analyze_image_file, detect_images
+from json_provider import install_json_provider
 
+logger = logging.getLogger("ai_server")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-UPLOAD_DIR = os.path.join(BASE_DIR, "ai_uploads")
+
+def _on_tmpfs(path):
+    """True if `path` resolves to somewhere under /dev/shm (compared by path component, not prefix)."""
+    return Path(os.path.realpath(path)).parts[:3] == ("/", "dev", "shm")
+
+def _make_shm_upload_dir():
+    """
+    Private per-process upload dir in /dev/shm: mkdtemp picks an unpredictable name, creates
+    it with mode 0700 and never reuses an existing directory or symlink. Removed at exit.
+    """
+    path = tempfile.mkdtemp(prefix="yolo-", dir="/dev/shm")
+    owner = os.getpid()
+    # only the creating process cleans up (not workers forked from it, e.g. gunicorn --preload)
+    atexit.register(lambda: os.getpid() == owner and shutil.rmtree(path, ignore_errors=True))
+    return path
+
+# Uploads are only needed until the model has read them, so by default they go to
+# tmpfs (/dev/shm, RAM-backed) when available: no disk write + read per request, and the
+# path can still be handed to another process on the same node. Override with AI_UPLOAD_DIR.
+UPLOAD_DIR = os.environ.get("AI_UPLOAD_DIR")
+if not UPLOAD_DIR and os.path.isdir("/dev/shm"):
+    try:
+        UPLOAD_DIR = _make_shm_upload_dir()
+    except OSError as e:
+        # e.g. read-only or full /dev/shm in a container: use the on-disk dir instead
+        logger.warning("/dev/shm unavailable for uploads (%s); using ai_uploads", e)
+if not UPLOAD_DIR:
+    UPLOAD_DIR = os.path.join(BASE_DIR, "ai_uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+# files in tmpfs use RAM, so delete them once analysed
+EPHEMERAL_UPLOADS = _on_tmpfs(UPLOAD_DIR)
+
+# per-request limits: bound the RAM (and tmpfs) a single /analyze/batch call can use
+MAX_BATCH_FILES = int(os.environ.get("AI_MAX_BATCH_FILES", "32"))
+MAX_UPLOAD_MB = int(os.environ.get("AI_MAX_UPLOAD_MB", "32"))
 
 app = Flask(__name__)
+# larger request bodies are rejected with 413 before any file is saved
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
 CORS(app)
+install_json_provider(app)
 
 ALLOWED_EXT = {"png", "jpg", "jpeg", "webp", "bmp"}
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXT
 
+def upload_path(f):
+    """Unique path in UPLOAD_DIR for an uploaded file (not yet written)."""
+    filename = secure_filename(f.filename)
+    unique = f"{os.urandom(8).hex()}_{filename}"
+    return os.path.join(UPLOAD_DIR, unique)
+
+def discard_upload(save_path):
+    """Delete an upload once analysed if it lives in tmpfs; on-disk uploads are kept."""
+    if not EPHEMERAL_UPLOADS:
+        return
+    try:
+        os.remove(save_path)
+    except OSError:
+        pass
+
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({"status":"ok", "service":"ai_server"})
@@ -36,17 +94,50 @@ def analyze():
     if not allowed_file(f.filename):
         return jsonify({"success": False, "error": "file type not allowed"}), 400
 
-    filename = secure_filename(f.filename)
-    unique = f"{os.urandom(8).hex()}_{filename}"
-    save_path = os.path.join(UPLOAD_DIR, unique)
-    f.save(save_path)
-
-    result = analyze_image_file(save_path)
-    # Optionally include saved path (not necessary for frontend)
-    result.setdefault("saved_path", save_path)
+    save_path = upload_path(f)
+    try:
+        f.save(save_path)
+        result = analyze_image_file(save_path)
+    finally:
+        discard_upload(save_path)
+    if not EPHEMERAL_UPLOADS:
+        # Optionally include saved path (not necessary for frontend)
+        result.setdefault("saved_path", save_path)
     result.setdefault("success", result.get("success", True))
     return jsonify(result)
 
+@app.route("/analyze/batch", methods=["POST"])
+def analyze_batch():
+    """
+    Accepts multipart/form-data with one or more "images" fields.
+    All images go through a single batched model call.
+    Returns {"success": true, "results": [...]} with one ai_service result per image, in order.
+    """
+    files = request.files.getlist("images")
+    if not files:
+        return jsonify({"success": False, "error": "no file part 'images'"}), 400
+    if len(files) > MAX_BATCH_FILES:
+        return jsonify({"success": False, "error": f"too many images (max {MAX_BATCH_FILES})"}), 400
+    for f in files:
+        if f.filename == "":
+            return jsonify({"success": False, "error": "empty filename"}), 400
+        if not allowed_file(f.filename):
+            return jsonify({"success": False, "error": f"file type not allowed: {f.filename}"}), 400
+
+    save_paths = [upload_path(f) for f in files]
+    try:
+        # saved inside the try, so a failed save still discards the uploads written before it
+        for f, save_path in zip(files, save_paths):
+            f.save(save_path)
+        results = detect_images(save_paths)
+    finally:
+        for save_path in save_paths:
+            discard_upload(save_path)
+    if not EPHEMERAL_UPLOADS:
+        for save_path, result in zip(save_paths, results):
+            result.setdefault("saved_path", save_path)
+    return jsonify({"success": True, "results": results})
+
 if __name__ == "__main__":
     # production: use a WSGI server; for dev use Flask's built-in
     app.run(host="0.0.0.0", port=5000, debug=False)
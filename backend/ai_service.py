@@ -3,13 +3,43 @@
 Robust AI service wrapper for Ultralytics YOLO.
 - Handles PyTorch >= 2.6 safe-loading via add_safe_globals if available.
 - Lazily loads model and returns stable JSON-friendly results.
+- Warms the model up with a dummy inference at load time on CUDA (YOLO_WARMUP=1/0 to force on/off).
+- Optionally exports to ONNX / TensorRT once and serves the cached engine (YOLO_ENGINE);
+  YOLO_ENGINE=ort runs the ONNX model with onnxruntime directly, bypassing ultralytics.
+- Optional reduced-precision inference: FP16 on CUDA, INT8 via ONNX Runtime (YOLO_PRECISION).
+- Decodes and letterboxes inputs once with OpenCV at a fixed YOLO_IMGSZ (YOLO_LETTERBOX=0 to skip).
+- Batched inference via detect_images(), plus optional request micro-batching (YOLO_BATCH_WINDOW_MS).
 - Works across a range of ultralytics result shapes.
 """
 
 import os
+import re
+import ast
+import time
 import logging
+import threading
+import contextlib
+import functools
+import weakref
+from collections import deque
+from types import MappingProxyType
+from concurrent.futures import Future
 from typing import List, Dict, Any
 
+# CPU threads per worker process. With W workers (WEB_CONCURRENCY, as used by gunicorn)
+# each one gets cores // W instead of all of them, to avoid oversubscription.
+# OMP_NUM_THREADS must be set before numpy / torch are imported for OpenMP to pick it up.
+_WORKERS = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+MODEL_TORCH_THREADS = int(os.environ.get("YOLO_TORCH_THREADS", "0")) or max(1, (os.cpu_count() or 1) // _WORKERS)
+os.environ.setdefault("OMP_NUM_THREADS", str(MODEL_TORCH_THREADS))
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:  # opencv ships with ultralytics; without it predict() reads paths itself
+    cv2 = None
+
 logger = logging.getLogger("ai_service")
 if not logger.handlers:
     ch = logging.StreamHandler()
@@ -21,10 +51,120 @@ logger.setLevel(logging.INFO)
 MODEL_WEIGHTS = os.environ.get("YOLO_WEIGHTS", "yolov8n.pt")
 MODEL_CONF_THRESH = float(os.environ.get("YOLO_CONF_THRESHOLD", "0.25"))
 MODEL_DEVICE = os.environ.get("YOLO_DEVICE", "")  # e.g. "cpu" or "0" or ""
+MODEL_IMGSZ = int(os.environ.get("YOLO_IMGSZ", "640"))
+MODEL_LETTERBOX = os.environ.get("YOLO_LETTERBOX", "1") == "1"  # letterbox to MODEL_IMGSZ with OpenCV before predict
+# YOLO_WARMUP=1 / 0 forces warm-up on / off; unset: warm up only on CUDA, where the cold start is costly
+MODEL_WARMUP = os.environ["YOLO_WARMUP"] == "1" if "YOLO_WARMUP" in os.environ else None
+MODEL_ENGINE = os.environ.get("YOLO_ENGINE", "").lower()  # "" (PyTorch), "onnx", "ort" (onnxruntime direct) or "trt"
+MODEL_MAX_DET = int(os.environ.get("YOLO_MAX_DET", "100"))  # keep only the top-K detections per image
+MODEL_BATCH_WINDOW_MS = float(os.environ.get("YOLO_BATCH_WINDOW_MS", "0"))  # >0 enables request micro-batching
+MODEL_BATCH_SIZE = int(os.environ.get("YOLO_BATCH_SIZE", "16"))  # max images per predict() call
+MODEL_PRECISION = os.environ.get("YOLO_PRECISION", "").lower()  # "" (default), "fp32", "fp16" (GPU) or "int8" (ONNX/CPU)
+
+# YOLO_ENGINE value -> ultralytics export format
+_ENGINE_FORMATS = {"onnx": "onnx", "ort": "onnx", "trt": "engine", "engine": "engine", "tensorrt": "engine"}
+
+# Example simple mapping for common recyclable objects. Expand this dictionary as needed.
+# Read-only: _recommend() memoizes results derived from it.
+_RECYCLE_MAPPING = MappingProxyType({
+    "bottle": MappingProxyType({"action": "Recycle", "points": 10, "carbon": 0.5}),
+    "plastic": MappingProxyType({"action": "Recycle", "points": 8, "carbon": 0.3}),
+    "can": MappingProxyType({"action": "Recycle (aluminum)", "points": 8, "carbon": 0.4}),
+    "paper": MappingProxyType({"action": "Recycle (paper)", "points": 5, "carbon": 0.1}),
+    "cardboard": MappingProxyType({"action": "Recycle (cardboard)", "points": 6, "carbon": 0.2}),
+    "electronics": MappingProxyType({"action": "E-waste dropoff", "points": 20, "carbon": 1.0})
+})
+# One compiled pattern over all mapping keys. Each key is an anchored lookahead
+# alternative, so keys are tried in dict order and the first key contained in the
+# name wins -- same result as `for key in mapping: if key in name`, without the Python loop.
+_RECYCLE_RE = re.compile("|".join(f"(?=.*?({re.escape(k)}))" for k in _RECYCLE_MAPPING), re.DOTALL)
 
 # Module-level caches
 _model = None
 _model_load_error = None
+_model_lock = threading.Lock()  # guards the one-time model load in load_model()
+_warmed_models = weakref.WeakSet()  # models that already ran _warmup (dropped when evicted)
+_names_cache = {}  # id(names mapping) -> (names mapping, class-id -> name table) for _names_table
+_NAMES_CACHE_SIZE = 8  # distinct models (default + A/B weights) whose tables are kept
+
+def _uses_cuda(device) -> bool:
+    """True if inference for `device` will run on a CUDA GPU."""
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return False
+    except Exception:
+        return False
+    return str(device or "").lower() != "cpu"
+
+def _configure_torch(device):
+    """Process-wide torch settings for inference-only serving."""
+    try:
+        import torch
+    except Exception as e:
+        logger.debug("torch not importable, skipping runtime config: %s", e)
+        return
+    torch.set_num_threads(MODEL_TORCH_THREADS)
+    try:
+        # one inter-op thread: requests already run in parallel across workers / threads
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # can only be set once, before any inter-op parallel work has started
+        pass
+    if _uses_cuda(device):
+        # input size is fixed (MODEL_IMGSZ), so let cuDNN autotune the fastest conv algorithms once
+        torch.backends.cudnn.benchmark = True
+        # allow TF32 matmuls on Ampere+ GPUs
+        torch.set_float32_matmul_precision("high")
+
+def _inference_mode():
+    """torch.inference_mode() if torch is available (cheaper than no_grad), else a no-op context."""
+    try:
+        import torch
+        return torch.inference_mode()
+    except Exception:
+        return contextlib.nullcontext()
+
+def _predict_kwargs(conf: float, device) -> Dict[str, Any]:
+    """Keyword arguments shared by every _model.predict call."""
+    # imgsz must match the export size when running an ONNX/TensorRT engine
+    kwargs = {"conf": conf, "device": device, "imgsz": MODEL_IMGSZ, "max_det": MODEL_MAX_DET, "verbose": False}
+    if _resolve_precision(device):
+        kwargs["half"] = True
+    return kwargs
+
+def _static_batch(model) -> bool:
+    """
+    True for ultralytics models backed by an exported ONNX / TensorRT file. Those are
+    exported with dynamic=False, i.e. a fixed batch of 1, and reject larger batches.
+    """
+    # ultralytics keeps the file path (not an nn.Module) in .model for exported formats
+    return isinstance(getattr(model, "model", None), (str, os.PathLike))
+
+def _warmup(device: str = None, model=None):
+    """
+    Run the model (default: the cached one) on a synthetic image so CUDA/cuDNN init
+    and kernel autotuning happen now rather than on the first real request. Never raises.
+    """
+    model = model if model is not None else _model
+    if model is None or model in _warmed_models:
+        return
+    device = device if device is not None else (MODEL_DEVICE or None)
+    dummy = np.zeros((MODEL_IMGSZ, MODEL_IMGSZ, 3), dtype=np.uint8)
+    cuda = _uses_cuda(device)
+    # PyTorch needs a couple of passes on GPU before graph optimisation / cuDNN autotune settles
+    runs = 3 if cuda else 1
+    try:
+        for _ in range(runs):
+            with _inference_mode():
+                model.predict(source=dummy, **_predict_kwargs(MODEL_CONF_THRESH, device))
+            if cuda:
+                import torch
+                torch.cuda.synchronize()
+        _warmed_models.add(model)
+        logger.info("Model warm-up done (%d run(s), imgsz=%d).", runs, MODEL_IMGSZ)
+    except Exception as e:
+        logger.warning("Model warm-up failed (continuing): %s", e)
 
 def _allowlist_ultralytics_detectionmodel():
     """If available, add safe globals to allow torch.load to unpickle ultralytics classes."""
@@ -54,34 +194,265 @@ def _allowlist_ultralytics_detectionmodel():
     except Exception as e:
         logger.debug("Could not perform add_safe_globals: %s", e)
 
-def load_model(weights: str = None, device: str = None):
-    """Load the YOLO model once (lazy). Raises on first critical failure and caches error."""
-    global _model, _model_load_error
-    if _model is not None:
-        return _model
-    if _model_load_error is not None:
-        raise RuntimeError("Previous model load failed: " + str(_model_load_error))
+class _OrtBoxes:
+    """Minimal stand-in for ultralytics Boxes: `data` is an [N, 6] array of xyxy, conf, cls."""
 
-    weights = weights or MODEL_WEIGHTS
-    device = device if device is not None else (MODEL_DEVICE or None)
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+class _OrtResult:
+    """Minimal stand-in for ultralytics Results, consumed by _extract_from_result_object."""
+
+    def __init__(self, data: np.ndarray, names):
+        self.boxes = _OrtBoxes(data)
+        self.names = names
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, iou_thresh: float) -> np.ndarray:
+    """Greedy non-maximum suppression on xyxy boxes. Returns kept indices, highest score first."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_thresh]
+    return np.asarray(keep, dtype=np.int64)
+
+class _OrtDetector:
+    """
+    Runs an exported YOLOv8 ONNX model with onnxruntime directly (YOLO_ENGINE=ort):
+    NumPy in, NumPy out, without ultralytics' tensor <-> numpy conversions around the session.
+    predict() mirrors the subset of YOLO.predict that this module uses.
+    """
+
+    IOU_THRESH = 0.7  # ultralytics' default NMS IoU for predict
+    MAX_WH = 7680  # per-class box offset for class-aware NMS in one pass (as ultralytics)
+
+    def __init__(self, onnx_path: str, names, device=None):
+        import onnxruntime as ort
+        providers = ["CPUExecutionProvider"]
+        if str(device or "").lower() != "cpu" and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = MODEL_TORCH_THREADS
+        self.session = ort.InferenceSession(onnx_path, sess_options=opts, providers=providers)
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        self.input_dtype = np.float16 if inp.type == "tensor(float16)" else np.float32
+        self.imgsz = inp.shape[2] if isinstance(inp.shape[2], int) else MODEL_IMGSZ
+        if names is None:
+            # ultralytics stores the class names in the export metadata as a dict literal
+            meta = self.session.get_modelmeta().custom_metadata_map
+            names = ast.literal_eval(meta.get("names", "{}"))
+        self.names = names
+
+    def predict(self, source, conf: float = 0.25, max_det: int = 300, stream: bool = False, **kwargs):
+        sources = source if isinstance(source, list) else [source]
+        results = (self._predict_one(src, conf, max_det) for src in sources)
+        return results if stream else list(results)
+
+    def _predict_one(self, src, conf: float, max_det: int) -> _OrtResult:
+        img = _read_image(src) if isinstance(src, str) else src
+        if not isinstance(img, np.ndarray):
+            raise ValueError(f"onnxruntime engine could not decode image: {src}")
+        lb = None
+        if img.shape[:2] != (self.imgsz, self.imgsz):
+            img, ratio, pad, orig_shape = _letterbox(img, self.imgsz)
+            lb = (ratio, pad, orig_shape)
+        # BGR HWC uint8 -> RGB NCHW [0, 1]
+        blob = np.ascontiguousarray(img[:, :, ::-1].transpose(2, 0, 1)[None], dtype=self.input_dtype)
+        blob /= 255.0
+        out = self.session.run(None, {self.input_name: blob})[0]
+        data = self._postprocess(out[0], conf, max_det)
+        if lb is not None:
+            data[:, :4] = _unletterbox_boxes(data[:, :4], *lb)
+        return _OrtResult(data, self.names)
 
+    def _postprocess(self, pred: np.ndarray, conf: float, max_det: int) -> np.ndarray:
+        """YOLOv8 head output [4 + nc, anchors] (cx, cy, w, h, class scores) -> [N, 6] xyxy, conf, cls."""
+        pred = pred.T.astype(np.float32, copy=False)
+        scores = pred[:, 4:]
+        cls = scores.argmax(axis=1)
+        best = scores[np.arange(len(cls)), cls]
+        mask = best >= conf
+        xywh, best, cls = pred[mask, :4], best[mask], cls[mask]
+        xyxy = np.empty_like(xywh)
+        xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+        keep = _nms(xyxy + (cls * self.MAX_WH)[:, None], best, self.IOU_THRESH)[:max_det]
+        return np.concatenate([xyxy[keep], best[keep, None], cls[keep, None].astype(np.float32)], axis=1)
+
+def _engine_artifact(weights: str, precision: str = None):
+    """
+    Cache path of the YOLO_ENGINE export for `weights`, or None if there is nothing to export.
+    Exports have a fixed input size and precision, so both are part of the name
+    (e.g. yolov8n-640-fp16.engine) and changing YOLO_IMGSZ / YOLO_PRECISION triggers a new export.
+    """
+    fmt = _ENGINE_FORMATS.get(MODEL_ENGINE)
+    if fmt is None or not str(weights).endswith(".pt"):
+        return None
+    if precision is None:
+        if fmt == "engine":
+            # TensorRT engines are built FP16 unless FP32 is explicitly requested
+            precision = "fp32" if MODEL_PRECISION == "fp32" else "fp16"
+        else:
+            precision = "int8" if MODEL_PRECISION == "int8" else "fp32"
+    return f"{os.path.splitext(weights)[0]}-{MODEL_IMGSZ}-{precision}.{fmt}"
+
+def _export_to(model, fmt: str, dest: str, device: str = None):
+    """Export `model` to `fmt` at MODEL_IMGSZ and move the result to `dest`."""
+    logger.info("Exporting %s to %s (one-time)...", dest, fmt)
+    export_kwargs = {"format": fmt, "imgsz": MODEL_IMGSZ, "dynamic": False}
+    if fmt == "engine":
+        export_kwargs["half"] = dest.endswith("-fp16.engine")
+        export_kwargs["device"] = device or 0
+    os.replace(model.export(**export_kwargs), dest)
+
+def _export_engine(model, weights: str, device: str = None):
+    """
+    Export a PyTorch YOLO model to the YOLO_ENGINE format and return the reloaded,
+    optimized model. The artifact is cached next to the weights (see _engine_artifact),
+    so the export only runs once per imgsz / precision. Falls back to the PyTorch model if export fails.
+    """
+    fmt = _ENGINE_FORMATS.get(MODEL_ENGINE)
+    if fmt is None:
+        if MODEL_ENGINE:
+            logger.warning("Unknown YOLO_ENGINE=%s; using PyTorch weights", MODEL_ENGINE)
+        return model
+    artifact = _engine_artifact(weights)
+    if artifact is None:
+        # already an exported artifact (e.g. YOLO_WEIGHTS=yolov8n.onnx)
+        return model
+
+    try:
+        if not os.path.exists(artifact):
+            if fmt == "onnx" and MODEL_PRECISION == "int8":
+                fp32_path = _engine_artifact(weights, precision="fp32")
+                if not os.path.exists(fp32_path):
+                    _export_to(model, fmt, fp32_path, device)
+                artifact = _quantize_onnx_int8(fp32_path, artifact)
+            else:
+                _export_to(model, fmt, artifact, device)
+        if MODEL_ENGINE == "ort":
+            logger.info("Serving %s directly with onnxruntime", artifact)
+            return _OrtDetector(artifact, model.names, device)
+        from ultralytics import YOLO
+        logger.info("Loading exported %s model from %s", fmt, artifact)
+        return YOLO(artifact, task="detect")
+    except Exception as e:
+        logger.warning("Export to %s failed, using PyTorch weights: %s", fmt, e)
+        return model
+
+def _quantize_onnx_int8(onnx_path: str, out_path: str) -> str:
+    """Dynamically quantize an ONNX model to INT8 weights at out_path. Returns the path to use."""
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        logger.info("Quantizing %s to INT8 (one-time)...", onnx_path)
+        quantize_dynamic(onnx_path, out_path, weight_type=QuantType.QUInt8)
+        return out_path
+    except Exception as e:
+        logger.warning("INT8 quantization failed, using FP32 ONNX model: %s", e)
+        return onnx_path
+
+@functools.lru_cache(maxsize=None)
+def _resolve_precision(device) -> bool:
+    """
+    Validate YOLO_PRECISION for this deployment. Returns True if predict should run with half=True.
+    Memoized per device, so the check (and any warning) happens once, not on every predict.
+    """
+    if MODEL_PRECISION in ("", "fp32"):
+        return False
+    if MODEL_PRECISION == "fp16":
+        if _ENGINE_FORMATS.get(MODEL_ENGINE) == "onnx":
+            # ONNX exports are FP32 (see _engine_artifact); half input would not match the session
+            logger.warning("YOLO_PRECISION=fp16 is not supported with YOLO_ENGINE=%s; running FP32", MODEL_ENGINE)
+            return False
+        if _uses_cuda(device):
+            return True
+        logger.warning("YOLO_PRECISION=fp16 needs a CUDA device; running FP32")
+        return False
+    if MODEL_PRECISION == "int8":
+        if _ENGINE_FORMATS.get(MODEL_ENGINE) != "onnx":
+            # torch dynamic quantization does not cover Conv2d, so INT8 goes through ONNX Runtime
+            logger.warning("YOLO_PRECISION=int8 requires YOLO_ENGINE=onnx; running FP32")
+        return False
+    logger.warning("Unknown YOLO_PRECISION=%s; running FP32", MODEL_PRECISION)
+    return False
+
+@functools.lru_cache(maxsize=4)
+def _load_yolo(weights: str, device: str):
+    """
+    Build a ready-to-serve YOLO for (weights, device): optional engine export and warm-up
+    included. Memoized, so several model variants (e.g. yolov8n and a custom recyclables
+    model) can be served side by side without paying the cold start on every switch.
+    Failed loads raise and are not cached. Call with _model_lock held.
+    """
     # attempt allowlist for safe unpickling
     _allowlist_ultralytics_detectionmodel()
+    _configure_torch(device)
 
-    try:
+    model = None
+    artifact = _engine_artifact(weights) if MODEL_ENGINE == "ort" else None
+    if artifact and os.path.exists(artifact):
+        # cached ONNX export: serve it directly, no need to build the PyTorch model first
+        try:
+            logger.info("Serving cached %s directly with onnxruntime", artifact)
+            model = _OrtDetector(artifact, None, device)
+        except Exception as e:
+            logger.warning("Cached ONNX model %s unusable, loading PyTorch weights: %s", artifact, e)
+    if model is None:
         from ultralytics import YOLO
         logger.info("Loading YOLO from weights=%s device=%s", weights, device or "default")
         if device:
-            _model = YOLO(weights, device=device)
+            model = YOLO(weights, device=device)
         else:
-            _model = YOLO(weights)
-        logger.info("Model loaded successfully.")
+            model = YOLO(weights)
+        model = _export_engine(model, weights, device)
+    _resolve_precision(device)
+    logger.info("Model loaded successfully.")
+    if MODEL_WARMUP or (MODEL_WARMUP is None and _uses_cuda(device)):
+        _warmup(device, model)
+    return model
+
+def load_model(weights: str = None, device: str = None):
+    """
+    Load the YOLO model once (lazy). Raises on first critical failure and caches error.
+    The default (_model) is always MODEL_WEIGHTS on MODEL_DEVICE; calls with other
+    weights/device return an additional memoized model and never touch the default or its error state.
+    Thread-safe: concurrent first calls wait for a single load instead of each loading the weights.
+    """
+    global _model, _model_load_error
+    if _model is not None and weights is None and device is None:
         return _model
-    except Exception as e:
-        _model_load_error = e
-        logger.error("Failed to load YOLO model: %s", e)
-        # keep error in state; callers can decide to fallback
-        raise
+
+    weights = weights or MODEL_WEIGHTS
+    device = device if device is not None else (MODEL_DEVICE or None)
+    if (weights, device) != (MODEL_WEIGHTS, MODEL_DEVICE or None):
+        # A/B variant: memoized by _load_yolo, failures raise to the caller only
+        with _model_lock:
+            return _load_yolo(weights, device)
+
+    with _model_lock:
+        # double-checked: another thread may have finished loading while we waited
+        if _model is not None:
+            return _model
+        if _model_load_error is not None:
+            raise RuntimeError("Previous model load failed: " + str(_model_load_error))
+
+        try:
+            # publish last, so the lock-free fast path never sees a half-prepared model
+            _model = _load_yolo(weights, device)
+            return _model
+        except Exception as e:
+            _model_load_error = e
+            logger.error("Failed to load YOLO model: %s", e)
+            # keep error in state; callers can decide to fallback
+            raise
 
 def _ensure_model() -> bool:
     """Ensure model is present. Returns True if model loaded, False otherwise."""
@@ -94,268 +465,410 @@ def _ensure_model() -> bool:
         logger.warning("Model ensure failed: %s", e)
         return False
 
-def _extract_from_result_object(r) -> List[Dict[str, Any]]:
+def _as_numpy(x) -> np.ndarray:
+    """Convert a torch tensor / numpy array / list-like to a numpy array."""
+    if hasattr(x, "cpu"):
+        return x.cpu().numpy()
+    return np.asarray(x)
+
+def _names_table(names) -> np.ndarray:
+    """
+    Class-id -> name lookup as a contiguous object array. Ultralytics hands back the
+    same model.names dict on every result, so this is built once per model, not per call.
+    """
+    cached = _names_cache.get(id(names))
+    # the mapping is stored alongside its table, so its id() cannot be reused while cached
+    if cached is not None and cached[0] is names:
+        return cached[1]
+    if isinstance(names, dict):
+        keys = [k for k in names if isinstance(k, int)]
+        size = max(keys) + 1 if keys else 0
+        names_tuple = tuple(names.get(i, str(i)) for i in range(size))
+    else:
+        names_tuple = tuple(names or ())
+    table = np.empty(len(names_tuple), dtype=object)
+    table[:] = names_tuple
+    if len(_names_cache) >= _NAMES_CACHE_SIZE:
+        _names_cache.clear()
+    _names_cache[id(names)] = (names, table)
+    return table
+
+def _class_names(names, cls_np: np.ndarray) -> np.ndarray:
+    """Map an array of integer class ids to names with a single vectorized gather."""
+    table = _names_table(names)
+    top = int(cls_np.max()) + 1 if cls_np.size else 0
+    if top > len(table):
+        # ids the model has no name for: fall back to the id as a string
+        table = np.concatenate([table, np.array([str(i) for i in range(len(table), top)], dtype=object)])
+    return table[cls_np]
+
+def _stack_box_objects(boxes: list):
+    """
+    Older ultralytics returned an iterable of per-box objects. Work out once (from the
+    first box) which attributes they expose, then gather them into (xyxy, conf, cls) arrays.
+    """
+    first = boxes[0]
+    xy_attr = next((a for a in ("xyxy", "bbox", "data") if getattr(first, a, None) is not None), None)
+    conf_attr = next((a for a in ("conf", "confidence") if getattr(first, a, None) is not None), None)
+    cls_attr = next((a for a in ("cls", "class_id") if getattr(first, a, None) is not None), None)
+
+    # xy_attr None: the box itself is a sequence of numbers
+    xyxy = np.stack([_as_numpy(getattr(b, xy_attr) if xy_attr else list(b)).reshape(-1)[:4] for b in boxes])
+    confs = np.stack([_as_numpy(getattr(b, conf_attr)).reshape(-1)[0] for b in boxes]) if conf_attr else None
+    cls_idxs = np.stack([_as_numpy(getattr(b, cls_attr)).reshape(-1)[0] for b in boxes]) if cls_attr else None
+    return xyxy, confs, cls_idxs
+
+def _extract_from_result_object(r, conf_thresh: float = None, letterbox=None) -> List[Dict[str, Any]]:
     """
     Given a single ultralytics Results object (r), try to extract detections robustly.
     Support multiple ultralytics versions by checking common shapes.
+    Detections below conf_thresh (if given) are dropped before dicts are built; the
+    rest are returned sorted by confidence desc, capped at MODEL_MAX_DET.
+    `letterbox` is the (ratio, (pad_w, pad_h), (h, w)) returned by _letterbox if the input
+    was letterboxed here; boxes are then mapped back to original image coordinates.
     """
     detections = []
     try:
         # Typical approach: r.boxes has xyxy, conf, cls
         boxes_obj = getattr(r, "boxes", None)
         names = getattr(r, "names", None) or {}
-        # If boxes_obj exists and has xyxy attribute (tensor/np), use that
-        if boxes_obj is not None:
+        if boxes_obj is None:
+            return detections
+
+        # work out the result layout once, then everything below is plain NumPy (no per-box try/except)
+        data = getattr(boxes_obj, "data", None)
+        if data is not None and getattr(data, "ndim", 0) == 2 and data.shape[-1] >= 6:
+            # Boxes.data packs [xyxy, (track_id), conf, cls] in one tensor:
+            # a single device->host copy instead of one per column
+            packed = _as_numpy(data)
+            xyxy, confs, cls_idxs = packed[:, :4], packed[:, -2], packed[:, -1]
+        else:
             # prefer .xyxy, .conf, .cls
             xyxy = getattr(boxes_obj, "xyxy", None)
             confs = getattr(boxes_obj, "conf", None)
             cls_idxs = getattr(boxes_obj, "cls", None)
-            # if those exist and are convertible to lists, do so
-            if xyxy is not None:
-                try:
-                    # allow torch tensor or numpy arrays or list-like
-                    if hasattr(xyxy, "cpu"):
-                        arr = xyxy.cpu().numpy().tolist()
-                    elif hasattr(xyxy, "tolist"):
-                        arr = xyxy.tolist()
-                    else:
-                        arr = list(xyxy)
-                except Exception:
-                    arr = list(xyxy)
-                # confs / cls conversion
-                conf_list = []
-                cls_list = []
-                if confs is not None:
-                    try:
-                        if hasattr(confs, "cpu"):
-                            conf_list = confs.cpu().numpy().tolist()
-                        elif hasattr(confs, "tolist"):
-                            conf_list = confs.tolist()
-                        else:
-                            conf_list = list(confs)
-                    except Exception:
-                        conf_list = [0.0] * len(arr)
-                else:
-                    conf_list = [0.0] * len(arr)
-
-                if cls_idxs is not None:
-                    try:
-                        if hasattr(cls_idxs, "cpu"):
-                            cls_list = cls_idxs.cpu().numpy().tolist()
-                        elif hasattr(cls_idxs, "tolist"):
-                            cls_list = cls_idxs.tolist()
-                        else:
-                            cls_list = list(cls_idxs)
-                    except Exception:
-                        cls_list = [None] * len(arr)
-                else:
-                    cls_list = [None] * len(arr)
-
-                for xy, conf, cls_idx in zip(arr, conf_list, cls_list):
-                    # sanitize
-                    try:
-                        bbox = [float(xy[0]), float(xy[1]), float(xy[2]), float(xy[3])]
-                    except Exception:
-                        continue
-                    try:
-                        conff = float(conf)
-                    except Exception:
-                        conff = 0.0
-                    name = None
-                    try:
-                        if cls_idx is not None and names:
-                            name = names[int(cls_idx)]
-                        elif cls_idx is not None:
-                            name = str(cls_idx)
-                    except Exception:
-                        name = str(cls_idx)
-                    detections.append({"name": name, "conf": conff, "bbox": bbox})
-                return detections
-
-            # fallback: iterate boxes as objects (older ultralytics returned iterable box objects)
-            try:
+            if hasattr(xyxy, "cpu") and hasattr(confs, "cpu") and hasattr(cls_idxs, "cpu"):
+                import torch
+                packed = _as_numpy(torch.cat([xyxy.reshape(-1, 4), confs.reshape(-1, 1).to(xyxy.dtype),
+                                              cls_idxs.reshape(-1, 1).to(xyxy.dtype)], dim=1))
+                xyxy, confs, cls_idxs = packed[:, :4], packed[:, 4], packed[:, 5]
+            elif xyxy is None and hasattr(boxes_obj, "__iter__"):
+                # fallback: iterate boxes as objects (older ultralytics returned iterable box objects)
                 iter_boxes = list(boxes_obj)
-            except Exception:
-                iter_boxes = None
-            if iter_boxes:
-                for b in iter_boxes:
-                    # try to read attributes
-                    xy = None
-                    for attr in ("xyxy", "bbox", "data", "__iter__"):
-                        try:
-                            val = getattr(b, attr, None)
-                            if val is None and attr == "__iter__":
-                                # attempt to coerce into list(b)
-                                try:
-                                    tmp = list(b)
-                                    if len(tmp) >= 4:
-                                        xy = [float(tmp[0]), float(tmp[1]), float(tmp[2]), float(tmp[3])]
-                                        break
-                                except Exception:
-                                    pass
-                            elif val is not None:
-                                if hasattr(val, "cpu"):
-                                    xy_t = val.cpu().numpy().tolist()
-                                elif hasattr(val, "tolist"):
-                                    xy_t = val.tolist()
-                                else:
-                                    xy_t = list(val)
-                                # xy_t may be shape (4,) or nested - take first 4 numbers
-                                if isinstance(xy_t[0], (list, tuple)):
-                                    xy = [float(xy_t[0][0]), float(xy_t[0][1]), float(xy_t[0][2]), float(xy_t[0][3])]
-                                else:
-                                    xy = [float(xy_t[0]), float(xy_t[1]), float(xy_t[2]), float(xy_t[3])]
-                                break
-                        except Exception:
-                            continue
-
-                    # conf and class
-                    try:
-                        conff = float(getattr(b, "conf", None) or getattr(b, "confidence", 0.0))
-                    except Exception:
-                        conff = 0.0
-                    cls_idx = getattr(b, "cls", None) or getattr(b, "class_id", None)
-                    name = None
-                    try:
-                        if cls_idx is not None and names:
-                            name = names[int(cls_idx)]
-                        elif cls_idx is not None:
-                            name = str(cls_idx)
-                    except Exception:
-                        name = str(cls_idx)
-                    if xy is not None:
-                        detections.append({"name": name, "conf": conff, "bbox": xy})
-                return detections
+                if not iter_boxes:
+                    return detections
+                xyxy, confs, cls_idxs = _stack_box_objects(iter_boxes)
+        if xyxy is None:
+            return detections
+
+        # keep everything as NumPy until the final dicts are built
+        xyxy_np = _as_numpy(xyxy).astype(np.float32, copy=False).reshape(-1, 4)
+        n = len(xyxy_np)
+        if confs is not None:
+            conf_np = _as_numpy(confs).astype(np.float32, copy=False).reshape(-1)[:n]
+        else:
+            conf_np = np.zeros(n, dtype=np.float32)
+        cls_np = _as_numpy(cls_idxs).astype(np.int64).reshape(-1)[:n] if cls_idxs is not None else None
+
+        # sort (conf desc) + threshold + top-K before any per-detection Python work
+        keep = np.argsort(-conf_np, kind="stable")
+        if conf_thresh is not None:
+            # predict() already applied conf; this is a cheap guard for engines that don't
+            keep = keep[conf_np[keep] >= conf_thresh]
+        keep = keep[:MODEL_MAX_DET]
+        xyxy_np, conf_np = xyxy_np[keep], conf_np[keep]
+        if cls_np is not None:
+            cls_np = cls_np[keep]
+        if letterbox is not None:
+            xyxy_np = _unletterbox_boxes(xyxy_np, *letterbox)
+
+        if cls_np is not None:
+            names_out = _class_names(names, cls_np).tolist()
+        else:
+            names_out = [None] * len(conf_np)
+        for name, conff, bbox in zip(names_out, conf_np.tolist(), xyxy_np.tolist()):
+            detections.append({"name": name, "conf": conff, "bbox": bbox})
 
     except Exception as e:
         logger.debug("Error parsing result object: %s", e)
-    # If we reach here, return empty list (no reliable boxes extracted)
+        # no reliable boxes extracted
+        return []
     return detections
 
-def detect_image(image_path: str, conf_thresh: float = None) -> Dict[str, Any]:
+def _read_image(image_path: str):
     """
-    Run detection and return a response dict to be returned by the Flask endpoint.
-    Response dict keys:
-      - success: bool
-      - detected_objects: list of {name, conf, bbox}
-      - recommendations: list[str]
-      - eco_points: int
-      - carbon_saved_kg: float
-      - debug: { ... }
+    Decode an image file to a BGR uint8 array (OpenCV / libjpeg-turbo) so predict()
+    gets an in-memory array. Returns None if the file does not exist. Formats OpenCV
+    cannot decode (e.g. GIF) fall back to the path so ultralytics can try its own loaders.
     """
-    conf_thresh = conf_thresh if conf_thresh is not None else MODEL_CONF_THRESH
-    debug = {"model_loaded": _model is not None, "detections_count": 0, "model_load_error": None}
+    img = cv2.imread(image_path, cv2.IMREAD_COLOR) if cv2 is not None else None
+    if img is not None:
+        return img
+    return image_path if os.path.exists(image_path) else None
 
-    # ensure model loaded
-    if not _ensure_model():
-        debug["model_load_error"] = str(_model_load_error) if _model_load_error else "Model not loaded"
-        logger.warning("Model unavailable; returning demo fallback result")
-        return {
-            "success": False,
-            "detected_objects": [],
-            "recommendations": ["Demo fallback: model unavailable."],
-            "eco_points": 0,
-            "carbon_saved_kg": 0.0,
-            "debug": debug
-        }
-
-    if not os.path.exists(image_path):
-        logger.error("Input image does not exist: %s", image_path)
-        return {
-            "success": False,
-            "detected_objects": [],
-            "recommendations": ["Image file not found."],
-            "eco_points": 0,
-            "carbon_saved_kg": 0.0,
-            "debug": {"error": "image_not_found"}
-        }
+def _letterbox(img: np.ndarray, imgsz: int):
+    """
+    Resize (keeping aspect ratio) and pad a BGR image to imgsz x imgsz with gray 114,
+    the same letterbox ultralytics applies, but done once here with OpenCV's SIMD kernels.
+    Returns (img, ratio, (pad_w, pad_h), (orig_h, orig_w)) -- pass the last three to
+    _unletterbox_boxes.
+    """
+    h, w = img.shape[:2]
+    ratio = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    if (new_w, new_h) != (w, h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    dw, dh = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    if top or bottom or left or right:
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return img, ratio, (left, top), (h, w)
 
-    try:
-        # run prediction using the cached model
-        # prefer to call .predict (Ultralytics API)
-        results = _model.predict(source=image_path, conf=conf_thresh, device=MODEL_DEVICE or None)
-    except Exception as e:
-        logger.exception("Error during model prediction: %s", e)
-        return {
-            "success": False,
-            "detected_objects": [],
-            "recommendations": ["AI prediction failed."],
-            "eco_points": 0,
-            "carbon_saved_kg": 0.0,
-            "debug": {"exception": str(e)}
-        }
-
-    # aggregate detections across result(s)
-    all_detections: List[Dict[str, Any]] = []
-    try:
-        for r in results:
-            ds = _extract_from_result_object(r)
-            if ds:
-                all_detections.extend(ds)
-    except Exception as e:
-        logger.debug("Failed to aggregate results: %s", e)
+def _unletterbox_boxes(xyxy: np.ndarray, ratio: float, pad, orig_shape) -> np.ndarray:
+    """Map xyxy boxes from letterboxed coordinates back onto the original image."""
+    pad_w, pad_h = pad
+    h, w = orig_shape
+    out = (xyxy - np.array([pad_w, pad_h, pad_w, pad_h], dtype=xyxy.dtype)) / ratio
+    np.clip(out[:, 0::2], 0, w, out=out[:, 0::2])
+    np.clip(out[:, 1::2], 0, h, out=out[:, 1::2])
+    return out
+
+def _failure_response(message: str, debug: Dict[str, Any]) -> Dict[str, Any]:
+    """Response dict for a request that could not be analysed."""
+    return {
+        "success": False,
+        "detected_objects": [],
+        "recommendations": [message],
+        "eco_points": 0,
+        "carbon_saved_kg": 0.0,
+        "debug": debug
+    }
+
+@functools.lru_cache(maxsize=1024)
+def _recommend(name):
+    """
+    (recommendation text, eco points, carbon kg) for a detected class name.
+    Memoized: names come from the model's fixed class list, so each one is classified once.
+    """
+    m = _RECYCLE_RE.match(name.lower()) if name else None
+    label = name or "Item"
+    if m:
+        chosen = _RECYCLE_MAPPING[m.group(m.lastindex)]
+        return f"{label} — {chosen['action']}", chosen["points"], chosen["carbon"]
+    # if we don't know, give a safe default
+    return f"{label} — Unknown: please consult local recycling rules", 0, 0.0
 
-    # sort by confidence desc and filter by conf_thresh
-    filtered = [d for d in all_detections if (d.get("conf", 0.0) >= (conf_thresh or 0.0))]
-    filtered.sort(key=lambda x: x.get("conf", 0.0), reverse=True)
-    debug["detections_count"] = len(filtered)
+def _build_response(detections: List[Dict[str, Any]], debug: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn extracted detections (filtered, sorted by conf desc) into the endpoint response dict."""
+    debug["detections_count"] = len(detections)
 
     # build simple recommendations + points mapping (customize to your needs)
     recommendations = []
     eco_points = 0
     carbon_saved = 0.0
 
-    if not filtered:
+    if not detections:
         recommendations.append("No objects detected. Try a clearer photo or different angle.")
     else:
-        # Example simple mapping for common recyclable objects. Expand this dictionary as needed.
-        mapping = {
-            "bottle": {"action": "Recycle", "points": 10, "carbon": 0.5},
-            "plastic": {"action": "Recycle", "points": 8, "carbon": 0.3},
-            "can": {"action": "Recycle (aluminum)", "points": 8, "carbon": 0.4},
-            "paper": {"action": "Recycle (paper)", "points": 5, "carbon": 0.1},
-            "cardboard": {"action": "Recycle (cardboard)", "points": 6, "carbon": 0.2},
-            "electronics": {"action": "E-waste dropoff", "points": 20, "carbon": 1.0}
-        }
         # For each detection derive recommendation
-        for det in filtered:
-            name = (det.get("name") or "").lower() if det.get("name") else ""
-            chosen = None
-            for key in mapping:
-                if key in name:
-                    chosen = mapping[key]
-                    break
-            if chosen:
-                recommendations.append(f"{det['name'] or 'Item'} — {chosen['action']}")
-                eco_points += chosen["points"]
-                carbon_saved += chosen["carbon"]
-            else:
-                # if we don't know, give a safe default
-                recommendations.append(f"{det['name'] or 'Item'} — Unknown: please consult local recycling rules")
-                eco_points += 0
-
-    # prepare detected objects in returned payload
-    out_detections = []
-    for d in filtered:
-        out_detections.append({
-            "name": d.get("name"),
-            "conf": float(d.get("conf") or 0.0),
-            "bbox": [float(v) for v in d.get("bbox", [])]
-        })
+        for det in detections:
+            text, points, carbon = _recommend(det.get("name"))
+            recommendations.append(text)
+            eco_points += points
+            carbon_saved += carbon
 
+    # detections are already JSON-ready {name, conf, bbox} dicts (built from .tolist() in the extractor)
     response = {
         "success": True,
-        "detected_objects": out_detections,
+        "detected_objects": detections,
         "recommendations": recommendations,
-        "eco_points": int(eco_points),
-        "carbon_saved_kg": float(round(carbon_saved, 3)),
+        "eco_points": eco_points,
+        "carbon_saved_kg": round(carbon_saved, 3),
         "debug": debug
     }
     return response
 
+def detect_images(image_paths: List[str], conf_thresh: float = None, weights: str = None) -> List[Dict[str, Any]]:
+    """
+    Run detection on several images with batched predict() calls (up to YOLO_BATCH_SIZE images each).
+    Returns one response dict per input path, in order (same shape as detect_image).
+    `weights` selects a model other than the default (loaded once, then memoized).
+    """
+    conf_thresh = conf_thresh if conf_thresh is not None else MODEL_CONF_THRESH
+    model_was_loaded = _model is not None
+
+    # validate / decode inputs first: a bad path must not trigger a (possibly multi-second) model load
+    responses: List[Dict[str, Any]] = [None] * len(image_paths)
+    valid = []
+    sources = []
+    letterboxes = []
+    for i, image_path in enumerate(image_paths):
+        img = _read_image(image_path)
+        if img is None:
+            logger.error("Input image does not exist: %s", image_path)
+            responses[i] = _failure_response("Image file not found.", {"error": "image_not_found"})
+            continue
+        lb = None
+        if MODEL_LETTERBOX and isinstance(img, np.ndarray):
+            # fixed MODEL_IMGSZ input: ultralytics' own letterbox becomes a no-op and cuDNN sees one shape
+            img, ratio, pad, orig_shape = _letterbox(img, MODEL_IMGSZ)
+            lb = (ratio, pad, orig_shape)
+        valid.append(i)
+        sources.append(img)
+        letterboxes.append(lb)
+    if not valid:
+        return responses
+
+    # ensure model loaded (the default one, or a memoized variant for `weights`)
+    model, load_error = None, None
+    if weights is None:
+        if _ensure_model():
+            model = _model
+        else:
+            load_error = _model_load_error
+    else:
+        try:
+            model = load_model(weights)
+        except Exception as e:
+            logger.warning("Model %s unavailable: %s", weights, e)
+            load_error = e
+    if model is None:
+        debug = {"model_loaded": False, "detections_count": 0,
+                 "model_load_error": str(load_error) if load_error else "Model not loaded"}
+        logger.warning("Model unavailable; returning demo fallback result")
+        for i in valid:
+            responses[i] = _failure_response("Demo fallback: model unavailable.", dict(debug))
+        return responses
+
+    # run prediction using the cached model; one call per MODEL_BATCH_SIZE decoded images.
+    # ultralytics runs a list source as one batch, so chunks bound its size; fixed batch-1
+    # engines get one call per image. Paths OpenCV could not decode each get their own call:
+    # ultralytics opens them while building the batch, and one bad file must not fail the others.
+    chunk = 1 if _static_batch(model) else max(1, MODEL_BATCH_SIZE)
+    arrays = [j for j, src in enumerate(sources) if isinstance(src, np.ndarray)]
+    groups = [arrays[k:k + chunk] for k in range(0, len(arrays), chunk)]
+    groups += [[j] for j, src in enumerate(sources) if not isinstance(src, np.ndarray)]
+    predict_kwargs = _predict_kwargs(conf_thresh, MODEL_DEVICE or None)
+    for group in groups:
+        try:
+            # prefer to call .predict (Ultralytics API)
+            # stream=True yields one Results per source image as soon as it is ready, so
+            # post-processing overlaps with the rest of the batch and Results are not all held at once
+            with _inference_mode():
+                results = model.predict(source=[sources[j] for j in group], stream=True, **predict_kwargs)
+                # detections arrive filtered and sorted by conf desc
+                for j, r in zip(group, results):
+                    debug = {"model_loaded": model_was_loaded, "detections_count": 0, "model_load_error": None}
+                    responses[valid[j]] = _build_response(_extract_from_result_object(r, conf_thresh, letterboxes[j]), debug)
+        except Exception as e:
+            logger.exception("Error during model prediction: %s", e)
+            for j in group:
+                if responses[valid[j]] is None:
+                    responses[valid[j]] = _failure_response("AI prediction failed.", {"exception": str(e)})
+    return responses
+
+def detect_image(image_path: str, conf_thresh: float = None, weights: str = None) -> Dict[str, Any]:
+    """
+    Run detection and return a response dict to be returned by the Flask endpoint.
+    Response dict keys:
+      - success: bool
+      - detected_objects: list of {name, conf, bbox}
+      - recommendations: list[str]
+      - eco_points: int
+      - carbon_saved_kg: float
+      - debug: { ... }
+    """
+    return detect_images([image_path], conf_thresh=conf_thresh, weights=weights)[0]
+
+class _MicroBatcher:
+    """
+    Collects concurrent single-image requests for up to `window_ms` (or until
+    `max_batch` are queued) and runs them through one detect_images() call.
+    Enabled for analyze_image_file when YOLO_BATCH_WINDOW_MS > 0.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, image_path: str, conf_thresh: float = None) -> Future:
+        fut = Future()
+        with self._cond:
+            if self._thread is None:
+                # started lazily so it is created in the serving process (after any fork)
+                self._thread = threading.Thread(target=self._run, name="yolo-microbatch", daemon=True)
+                self._thread.start()
+            self._queue.append((image_path, conf_thresh, fut))
+            self._cond.notify()
+        return fut
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+            try:
+                self._flush(batch)
+            except Exception as e:
+                # keep the worker thread alive; fail whatever this batch left unanswered
+                logger.exception("Micro-batch flush failed: %s", e)
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def _flush(self, batch):
+        # one predict() per distinct confidence threshold in the batch
+        groups: Dict[Any, list] = {}
+        for item in batch:
+            groups.setdefault(item[1], []).append(item)
+        for conf_thresh, items in groups.items():
+            try:
+                responses = detect_images([path for path, _, _ in items], conf_thresh=conf_thresh)
+            except Exception as e:
+                for _, _, fut in items:
+                    fut.set_exception(e)
+                continue
+            for (_, _, fut), response in zip(items, responses):
+                fut.set_result(response)
+
+_batcher = _MicroBatcher(MODEL_BATCH_WINDOW_MS, MODEL_BATCH_SIZE) if MODEL_BATCH_WINDOW_MS > 0 else None
+
+def preload() -> bool:
+    """
+    Load and warm the model in the current process. Call this from worker-init
+    hooks so each worker is hot before it accepts traffic:
+      - gunicorn: see gunicorn.conf.py (post_fork hook), `gunicorn -c gunicorn.conf.py app:app`
+      - celery: connected to worker_process_init below when celery is installed
+    Returns True if the model is ready; never raises. Warm-up is skipped with YOLO_WARMUP=0.
+    """
+    if not _ensure_model():
+        return False
+    if MODEL_WARMUP is not False:
+        _warmup()
+    return True
+
+try:
+    from celery.signals import worker_process_init
+    worker_process_init.connect(lambda **kwargs: preload(), weak=False)
+except ImportError:
+    pass
+
 # Backwards-compatible wrapper used by your Flask app
 def analyze_image_file(image_path: str, conf_threshold: float = None) -> Dict[str, Any]:
     """Compatibility wrapper: returns the response dict expected by the Flask route."""
+    if _batcher is not None:
+        return _batcher.submit(image_path, conf_threshold).result()
     return detect_image(image_path, conf_thresh=(conf_threshold if conf_threshold is not None else None) if False else conf_threshold)
 
 # quick health helper
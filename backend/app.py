@@ -19,6 +19,7 @@ from werkzeug.utils import secure_filename
 # local modules (ensure these exist: database.py and ai_service.py)
 from database import Database
 from ai_service import analyze_image_file
+from json_provider import install_json_provider
 
 # -----------------------
 # Config
@@ -40,6 +41,7 @@ HOST = os.environ.get("HOST", "0.0.0.0")
 app = Flask(__name__, static_folder=str(FRONTEND_DIR), static_url_path="/static")
 CORS(app)
 logging.basicConfig(level=logging.INFO)
+install_json_provider(app)
 
 # -----------------------
 # Database init
@@ -0,0 +1,31 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for the EcoWise Flask backends.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+    gunicorn -c gunicorn.conf.py ai_server:app
+
+Each worker loads and warms the YOLO model right after it is forked, so the
+model cold start is paid before the worker accepts its first request.
+The model is loaded post-fork (not with --preload) because CUDA contexts
+do not survive fork().
+"""
+
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# model load + warm-up can take a while on first boot
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+
+def post_fork(server, worker):
+    # ai_service splits CPU threads across workers based on this; use the effective
+    # worker count (config file, -w / --workers) and export it before the import
+    os.environ["WEB_CONCURRENCY"] = str(server.cfg.workers)
+    import ai_service
+    if ai_service.preload():
+        server.log.info("worker %s: model preloaded", worker.pid)
+    else:
+        server.log.warning("worker %s: model preload failed; requests will use fallback", worker.pid)
@@ -0,0 +1,42 @@
+# json_provider.py
+"""
+Fast JSON responses for the Flask apps, backed by orjson when it is installed.
+
+Usage:
+    from json_provider import install_json_provider
+    install_json_provider(app)   # jsonify() now serializes with orjson
+
+orjson is several times faster than the stdlib json module for the
+detection payloads (lists of floats) and also serializes NumPy arrays and
+scalars natively. Without orjson, Flask's default provider is kept.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson; unknown types fall back to Flask's default()."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        # keep Flask's output stable: it sorts keys by default
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def install_json_provider(app) -> bool:
+    """Switch `app` to the orjson provider. Returns False (and changes nothing) if orjson is missing."""
+    if orjson is None:
+        app.logger.info("orjson not installed; using Flask's default JSON provider.")
+        return False
+    app.json = OrjsonProvider(app)
+    return True
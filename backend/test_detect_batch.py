@@ -0,0 +1,80 @@
+# test_detect_batch.py - checks that one undecodable upload only fails its own result
+# run: python test_detect_batch.py   (or: python -m pytest test_detect_batch.py)
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+import ai_service
+from ai_service import _OrtResult
+
+
+class _StubModel:
+    """Mimics ultralytics' list source: string entries are opened with PIL before any result is yielded."""
+
+    names = {0: "bottle"}
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, source, stream=False, **kwargs):
+        self.calls.append(len(source))
+        for src in source:
+            if isinstance(src, str):
+                Image.open(src)
+        return iter([_OrtResult(np.array([[1, 2, 3, 4, 0.9, 0]], dtype=np.float32), self.names)
+                     for _ in source])
+
+
+def _write_files(tmp):
+    good = os.path.join(tmp, "good.jpg")
+    Image.fromarray(np.full((48, 64, 3), 128, dtype=np.uint8)).save(good)
+    corrupt = os.path.join(tmp, "corrupt.jpg")
+    with open(corrupt, "wb") as fh:
+        fh.write(b"not an image")
+    return good, corrupt
+
+
+def _with_stub(fn):
+    saved = ai_service._model
+    ai_service._model = _StubModel()
+    try:
+        return fn(ai_service._model)
+    finally:
+        ai_service._model = saved
+
+
+def test_mixed_good_bad_batch():
+    with tempfile.TemporaryDirectory() as tmp:
+        good, corrupt = _write_files(tmp)
+
+        def run(model):
+            responses = ai_service.detect_images([good, corrupt, good, os.path.join(tmp, "missing.jpg")])
+            assert [r["success"] for r in responses] == [True, False, True, False]
+            assert responses[0]["detected_objects"][0]["name"] == "bottle"
+            assert responses[1]["debug"].get("exception")
+            assert responses[3]["debug"].get("error") == "image_not_found"
+            # the two decoded images share one predict(); the corrupt path gets its own
+            assert sorted(model.calls) == [1, 2]
+
+        _with_stub(run)
+
+
+def test_mixed_good_bad_micro_batch():
+    with tempfile.TemporaryDirectory() as tmp:
+        good, corrupt = _write_files(tmp)
+
+        def run(model):
+            batcher = ai_service._MicroBatcher(window_ms=50, max_batch=3)
+            futures = [batcher.submit(path) for path in (good, corrupt, good)]
+            assert [f.result(timeout=10)["success"] for f in futures] == [True, False, True]
+
+        _with_stub(run)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print("ok", name)
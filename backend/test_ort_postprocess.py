@@ -0,0 +1,54 @@
+# test_ort_postprocess.py - checks the YOLO_ENGINE=ort decode + NMS on synthetic head output
+# run: python test_ort_postprocess.py   (or: python -m pytest test_ort_postprocess.py)
+import numpy as np
+
+from ai_service import _OrtDetector
+
+NUM_CLASSES = 3
+
+
+def _head(*anchors):
+    """Build a YOLOv8 head output [4 + nc, anchors] from (cx, cy, w, h, cls, score) tuples."""
+    pred = np.zeros((4 + NUM_CLASSES, len(anchors)), dtype=np.float32)
+    for j, (cx, cy, w, h, cls, score) in enumerate(anchors):
+        pred[:4, j] = (cx, cy, w, h)
+        pred[4 + cls, j] = score
+    return pred
+
+
+def _postprocess(pred, conf=0.25, max_det=300):
+    # only _postprocess is exercised, so skip __init__ (no onnxruntime session needed)
+    detector = _OrtDetector.__new__(_OrtDetector)
+    return detector._postprocess(pred, conf, max_det)
+
+
+def test_same_class_overlap_is_suppressed():
+    out = _postprocess(_head((50, 50, 20, 20, 0, 0.9), (51, 51, 20, 20, 0, 0.8)))
+    assert out.shape == (1, 6)
+    np.testing.assert_allclose(out[0], [40, 40, 60, 60, 0.9, 0], rtol=1e-6)
+
+
+def test_cross_class_overlap_survives():
+    out = _postprocess(_head((50, 50, 20, 20, 0, 0.9), (51, 51, 20, 20, 1, 0.8)))
+    assert out.shape == (2, 6)
+    assert out[:, 5].tolist() == [0, 1]
+    np.testing.assert_allclose(out[:, 4], [0.9, 0.8], rtol=1e-6)
+
+
+def test_conf_cutoff():
+    out = _postprocess(_head((50, 50, 20, 20, 0, 0.9), (200, 200, 20, 20, 2, 0.3)), conf=0.5)
+    assert out.shape == (1, 6)
+    assert out[0, 5] == 0
+
+
+def test_empty_result():
+    out = _postprocess(_head((50, 50, 20, 20, 0, 0.1)), conf=0.5)
+    assert out.shape == (0, 6)
+    assert _postprocess(np.zeros((4 + NUM_CLASSES, 0), dtype=np.float32)).shape == (0, 6)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print("ok", name)